@@ -0,0 +1,38 @@
+"""
+numba_kernels.py
+
+Numba-compiled array kernels shared by the EDA cleaning steps.
+
+Kernels operate in place on 2-D float arrays laid out as (rows=dates,
+columns=tickers) and are compiled once, then cached on disk (`cache=True`).
+"""
+
+import numpy as np
+from numba import njit, prange
+
+
+@njit(parallel=True, cache=True)
+def ffill_bfill_2d(a: np.ndarray) -> np.ndarray:
+    """Forward-fill then back-fill NaNs in each column of `a`, in place.
+
+    Equivalent to `DataFrame.ffill().bfill()`, but both fills run in one
+    compiled pass per column and columns are processed in parallel. Pass a
+    Fortran-ordered array so each column is contiguous. Returns `a`.
+    """
+    n_rows, n_cols = a.shape
+    for j in prange(n_cols):
+        # Forward pass: carry the last seen value down the column
+        last = np.nan
+        for i in range(n_rows):
+            if np.isnan(a[i, j]):
+                a[i, j] = last
+            else:
+                last = a[i, j]
+        # Backward pass: only leading NaNs are left, fill them from below
+        last = np.nan
+        for i in range(n_rows - 1, -1, -1):
+            if np.isnan(a[i, j]):
+                a[i, j] = last
+            else:
+                last = a[i, j]
+    return a